@@ -0,0 +1,263 @@
+# =========================================
+# IMPORTS
+# =========================================
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import plotly.express as px
+import collections
+import os
+import threading
+
+
+# =========================================
+# UTILITY — CACHED DATASET LOADING
+# =========================================
+def _unique_names(names):
+    """
+    Suffix repeated headers pandas-style (a, a → a, a.1) so every
+    column can be selected by name.
+    """
+    counts = {}
+    unique = []
+    for name in names:
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        counts[name] = count + 1
+        unique.append(name)
+    return unique
+
+
+def _read_csv(path):
+    """
+    Parse a CSV with Arrow's multithreaded reader.
+    Date-like columns are kept as text so they remain
+    categorical dimensions, as with the pandas parser.
+    """
+    with pacsv.open_csv(path) as reader:
+        schema = reader.schema
+
+    names = _unique_names(schema.names)
+    text_cols = {
+        name: pa.string()
+        for name, field in zip(names, schema)
+        if pa.types.is_temporal(field.type)
+    }
+
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(
+            use_threads=True,
+            column_names=names,
+            skip_rows=1,
+        ),
+        convert_options=pacsv.ConvertOptions(
+            column_types=text_cols,
+            strings_can_be_null=True,
+        ),
+    )
+
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            # All-empty columns are missing numbers to pandas, not None objects
+            table = table.set_column(
+                i, field.name, pa.nulls(table.num_rows, pa.float64())
+            )
+
+    return table.to_pandas()
+
+
+def _read_dataset(path):
+    if path.endswith(".feather"):
+        # Cleaned artifacts are written by us with their dtypes intact
+        return pd.read_feather(path)
+    df = _read_csv(path)
+    return restore_integer_columns(df, df.select_dtypes(include="number").columns)
+
+
+DATASET_CACHE_BYTES = 512 * 1024 * 1024
+
+# path → ((mtime_ns, size), DataFrame, bytes), least recently used first
+_datasets = collections.OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+def load_dataset(path):
+    """
+    Return the parsed DataFrame for a raw CSV or cleaned Feather file.
+    The file is only re-read when its mtime or size changes,
+    so the returned frame is shared and must not be mutated.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _datasets_lock:
+        entry = _datasets.get(path)
+        if entry and entry[0] == version:
+            _datasets.move_to_end(path)
+            return entry[1]
+
+    df = _read_dataset(path)
+    nbytes = int(df.memory_usage(deep=True).sum())
+
+    with _datasets_lock:
+        # One entry per path: a rewritten file replaces its old frame
+        _datasets[path] = (version, df, nbytes)
+        _datasets.move_to_end(path)
+
+        total = sum(entry[2] for entry in _datasets.values())
+        while total > DATASET_CACHE_BYTES and len(_datasets) > 1:
+            _, (_, _, evicted) = _datasets.popitem(last=False)
+            total -= evicted
+
+    return df
+
+
+def dataset_key(path):
+    """
+    Identify one version of a data file, for caching derived results.
+    """
+    stat = os.stat(path)
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# =========================================
+# UTILITY — COUNT MISSING VALUES
+# =========================================
+def total_nulls(df):
+    # One reduction over the boolean mask, no per-column Series
+    return int(df.isna().to_numpy().sum())
+
+
+# =========================================
+# STAGE 5.5 — AUTO INSIGHTS
+# =========================================
+def generate_insights(df, numeric_cols, categorical_cols):
+    insights = []
+
+    insights.append(
+        f"The dataset contains {df.shape[0]} rows and {df.shape[1]} columns."
+    )
+
+    total_missing = total_nulls(df)
+    if total_missing == 0:
+        insights.append("There are no missing values after cleaning.")
+    else:
+        insights.append(f"There are {total_missing} missing values remaining.")
+
+    if len(numeric_cols):
+        stats = df[numeric_cols].agg(["mean", "min", "max"])
+        for col in numeric_cols:
+            low, high = stats.at["min", col], stats.at["max", col]
+            # agg() upcasts to float; keep integer columns printed as integers
+            if pd.api.types.is_integer_dtype(df[col].dtype):
+                low, high = int(low), int(high)
+            insights.append(
+                f"'{col}' has an average of {stats.at['mean', col]:.2f}, "
+                f"with values ranging from {low} to {high}."
+            )
+
+    for col in categorical_cols:
+        # Unsorted counts are enough for the top value
+        counts = df[col].value_counts(sort=False)
+        if counts.empty:
+            continue
+        insights.append(
+            f"The most frequent value in '{col}' is '{counts.idxmax()}'."
+        )
+
+    return insights
+
+
+# =========================================
+# UTILITY — BUILD CHART FIGURE
+# =========================================
+CHARTS_TTL = 60 * 60
+
+
+def build_chart(df, chart_type, metric, dimension):
+    if chart_type == "bar":
+        return px.bar(df, x=dimension, y=metric)
+    elif chart_type == "line":
+        return px.line(df, x=dimension, y=metric)
+    elif chart_type == "area":
+        return px.area(df, x=dimension, y=metric)
+    elif chart_type == "histogram":
+        return px.histogram(df, x=metric)
+    elif chart_type == "pie":
+        return px.pie(df, names=dimension, values=metric)
+    elif chart_type == "box":
+        return px.box(df, x=dimension, y=metric)
+    elif chart_type == "scatter":
+        return px.scatter(df, x=dimension, y=metric)
+
+
+# =========================================
+# UTILITY — RESTORE INTEGER COLUMNS
+# =========================================
+def restore_integer_columns(df, numeric_cols):
+    block = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    missing = np.isnan(block)
+    with np.errstate(invalid="ignore"):
+        # inf % 1 is NaN, so infinite values keep a column as float
+        whole = (missing | (np.mod(block, 1) == 0)).all(axis=0) & ~missing.all(axis=0)
+
+    integer_cols = {
+        col: "Int64"
+        for col in numeric_cols[whole]
+        if df[col].dtype != "Int64"
+    }
+    return df.astype(integer_cols) if integer_cols else df
+
+
+# =========================================
+# STAGE 7 — DATA WARNINGS
+# =========================================
+def detect_data_warnings(df, numeric_cols, categorical_cols):
+    warnings = []
+
+    # One float block for all numeric columns; NaN marks missing values
+    values = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    counts = (~np.isnan(values)).sum(axis=0)
+    present = counts > 0
+    values, numeric_cols, counts = values[:, present], numeric_cols[present], counts[present]
+
+    if len(numeric_cols):
+        q1, median, q3 = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+        iqr = q3 - q1
+
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+
+        outlier_counts = ((values < lower) | (values > upper)).sum(axis=0)
+
+        mean = np.nanmean(values, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Sample std (ddof=1) like pandas; NaN for single-value columns
+            std = np.sqrt(np.nansum((values - mean) ** 2, axis=0) / (counts - 1))
+        skewed = np.abs(mean - median) > std
+
+        for col, outliers, is_skewed in zip(numeric_cols, outlier_counts, skewed):
+            if outliers > 0:
+                warnings.append(
+                    f"Column '{col}' contains {outliers} potential outliers."
+                )
+
+            if is_skewed:
+                warnings.append(
+                    f"Column '{col}' appears to be skewed."
+                )
+
+    unique_counts = df[categorical_cols].nunique()
+    for col, unique_count in unique_counts.items():
+        if unique_count > 15:
+            warnings.append(
+                f"Column '{col}' has high cardinality ({unique_count} unique values)."
+            )
+
+    return warnings
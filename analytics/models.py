@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 class Dataset(models.Model):
@@ -6,3 +8,22 @@ class Dataset(models.Model):
 
     def __str__(self):
         return self.file.name
+
+
+class CachedFile(models.Model):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file = models.FileField(upload_to='reports/', blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
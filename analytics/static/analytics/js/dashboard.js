@@ -0,0 +1,42 @@
+// =========================================
+// PDF EXPORT — QUEUE REPORT + POLL STATUS
+// =========================================
+const POLL_INTERVAL_MS = 1000;
+const MAX_POLLS = 120;
+
+function pollReport(statusUrl, attempt = 0) {
+  if (attempt >= MAX_POLLS) {
+    return Promise.reject(new Error("Report generation timed out."));
+  }
+
+  return fetch(statusUrl)
+    .then(response => response.json())
+    .then(data => {
+      if (data.status === "ready") {
+        return data.download_url;
+      }
+      if (data.status === "failed") {
+        throw new Error("Report generation failed.");
+      }
+      return new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS))
+        .then(() => pollReport(statusUrl, attempt + 1));
+    });
+}
+
+document.querySelectorAll("form[data-report-export]").forEach(form => {
+  form.addEventListener("submit", event => {
+    event.preventDefault();
+
+    fetch(form.action, { method: "POST", body: new FormData(form) })
+      .then(response => response.json().then(data => {
+        if (!response.ok) {
+          throw new Error(data.error);
+        }
+        return pollReport(data.status_url);
+      }))
+      .then(downloadUrl => {
+        window.location.href = downloadUrl;
+      })
+      .catch(error => alert(error.message));
+  });
+});
@@ -0,0 +1,135 @@
+# =========================================
+# IMPORTS
+# =========================================
+from celery import shared_task
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .analysis import (
+    CHARTS_TTL,
+    build_chart,
+    dataset_key,
+    detect_data_warnings,
+    generate_insights,
+    load_dataset,
+    total_nulls,
+)
+from .models import CachedFile
+
+import base64
+import datetime
+
+
+# =========================================
+# UTILITY — EXPIRE OLD REPORTS
+# =========================================
+REPORT_TTL = datetime.timedelta(hours=1)
+
+
+def purge_expired_reports():
+    """
+    Delete reports (and their PDFs) older than REPORT_TTL,
+    whether they finished or failed.
+    """
+    cutoff = timezone.now() - REPORT_TTL
+    for report in CachedFile.objects.filter(created_at__lt=cutoff):
+        if report.file:
+            report.file.delete(save=False)
+        report.delete()
+
+
+# =========================================
+# UTILITY — CHART DATA VERSION
+# =========================================
+def chart_data_is_current(chart):
+    """
+    The cleaned dataset is rewritten in place, so a chart can only be
+    rendered from its file while that file is still the version it was shown on.
+    """
+    try:
+        return dataset_key(chart["data_path"]) == chart["data_key"]
+    except FileNotFoundError:
+        return False
+
+
+# =========================================
+# STAGE 8 → 10 — BUILD PDF REPORT
+# =========================================
+@shared_task
+def build_report(file_id, data_path, charts, selected_indexes):
+    try:
+        # WeasyPrint needs Pango; only the worker that renders PDFs should load it
+        from weasyprint import HTML
+
+        report = CachedFile.objects.get(pk=file_id)
+
+        df = load_dataset(data_path)
+
+        total_rows, total_cols = df.shape
+        missing_values = total_nulls(df)
+
+        table_html = df.head(20).to_html(index=False, classes="centered", border=0)
+
+        numeric_cols = df.select_dtypes(include="number").columns
+        categorical_cols = df.select_dtypes(include="object").columns
+
+        insights = generate_insights(df, numeric_cols, categorical_cols)
+        warnings = detect_data_warnings(df, numeric_cols, categorical_cols)
+
+        # -------------------------------------
+        # FILTER SELECTED CHARTS
+        # -------------------------------------
+        if selected_indexes:
+            charts = [
+                charts[int(i)]
+                for i in selected_indexes
+                if i.isdigit() and int(i) < len(charts)
+            ]
+
+        # -------------------------------------
+        # RENDER CHART IMAGES (ONCE PER CHART)
+        # -------------------------------------
+        for chart in charts:
+            cache_key = f"chart_img:{chart['digest']}"
+            svg = caches["chart_images"].get(cache_key)
+
+            if svg is None and not chart_data_is_current(chart):
+                chart["stale"] = True
+                continue
+
+            if svg is None:
+                chart_df = load_dataset(chart["data_path"])
+                fig = build_chart(
+                    chart_df, chart["chart_type"], chart["metric"], chart["dimension"]
+                )
+                svg = fig.to_image(format="svg")
+                caches["chart_images"].set(cache_key, svg, CHARTS_TTL)
+
+            # inlined as a data URI, so the PDF never reads images from disk
+            chart["svg_base64"] = base64.b64encode(svg).decode("ascii")
+
+        template = get_template("analytics/report.html")
+        html = template.render({
+            "total_rows": total_rows,
+            "total_cols": total_cols,
+            "missing_values": missing_values,
+            "table_html": table_html,
+            "insights": insights,
+            "warnings": warnings,
+            "charts": charts,
+        })
+
+        pdf = HTML(string=html).write_pdf()
+
+        report.file.save(f"{file_id}.pdf", ContentFile(pdf), save=False)
+        report.status = CachedFile.READY
+        report.save(update_fields=["file", "status"])
+
+    except Exception:
+        # Any failure, including a missing Pango, must reach the polling page
+        CachedFile.objects.filter(pk=file_id).update(status=CachedFile.FAILED)
+        raise
+
+    return file_id
@@ -1,3 +1,398 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from kombu.exceptions import OperationalError
 
-# Create your tests here.
+from . import analysis
+from .analysis import (
+    _read_csv,
+    detect_data_warnings,
+    generate_insights,
+    load_dataset,
+    restore_integer_columns,
+)
+from .models import CachedFile
+
+import numpy as np
+import pandas as pd
+import collections
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+
+def random_frame(seed, rows=200):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(50, 10, rows),
+        "skewed": rng.exponential(5, rows) ** 3,
+        "sparse": np.where(rng.random(rows) < 0.7, np.nan, rng.normal(0, 1, rows)),
+        "empty": np.full(rows, np.nan),
+        "single": [7.0] + [np.nan] * (rows - 1),
+        "wide": rng.integers(0, 40, rows).astype(str),
+        "narrow": rng.choice(["a", "b", "c"], rows),
+    })
+    df.loc[rng.integers(0, rows, 5), "normal"] = 500.0
+    return df
+
+
+# =========================================
+# UTILITY — CACHED DATASET LOADING
+# =========================================
+class ReadCsvTests(SimpleTestCase):
+
+    def read(self, text):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(text)
+        self.addCleanup(pathlib.Path(f.name).unlink)
+        return _read_csv(f.name)
+
+    def test_empty_column_is_numeric(self):
+        df = self.read("a,b\n1,\n2,\n3,\n")
+
+        self.assertEqual(df["b"].dtype, np.float64)
+        self.assertTrue(df["b"].isna().all())
+
+    def test_duplicate_headers_are_renamed(self):
+        df = self.read("a,b,a\n1,2,3\n")
+
+        self.assertEqual(list(df.columns), ["a", "b", "a.1"])
+        self.assertEqual(df["a.1"].tolist(), [3])
+
+    def test_dates_stay_text(self):
+        df = self.read("d,v\n2020-01-01,1\n2020-02-01,2\n")
+
+        self.assertEqual(df["d"].dtype, object)
+
+
+class LoadDatasetTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.tmp = pathlib.Path(tmp)
+
+        datasets = mock.patch.object(analysis, "_datasets", collections.OrderedDict())
+        datasets.start()
+        self.addCleanup(datasets.stop)
+
+    def write(self, name, text, mtime_ns):
+        path = self.tmp / name
+        path.write_text(text)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        return str(path)
+
+    def test_rewritten_file_replaces_cached_frame(self):
+        path = self.write("a.csv", "a\n1\n", 10**18)
+        first = load_dataset(path)
+
+        self.assertIs(load_dataset(path), first)
+
+        self.write("a.csv", "a\n2\n", 2 * 10**18)
+
+        self.assertEqual(load_dataset(path)["a"].tolist(), [2])
+        self.assertEqual(len(analysis._datasets), 1)
+
+    @mock.patch.object(analysis, "DATASET_CACHE_BYTES", 1)
+    def test_byte_budget_keeps_latest_frame(self):
+        load_dataset(self.write("a.csv", "a\n1\n", 10**18))
+        latest = self.write("b.csv", "b\n1\n", 10**18)
+        load_dataset(latest)
+
+        self.assertEqual(list(analysis._datasets), [latest])
+
+
+class DashboardTestCase(TestCase):
+    """
+    Runs views against a throwaway MEDIA_ROOT and an in-memory cache.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        settings_override = override_settings(
+            MEDIA_ROOT=pathlib.Path(media_root),
+            CACHES={
+                alias: {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": alias,
+                }
+                for alias in ("default", "chart_images")
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, text, **options):
+        return self.client.post(reverse("upload"), {
+            "file": SimpleUploadedFile("data.csv", text.encode()),
+            **options,
+        })
+
+
+class UploadPageTests(DashboardTestCase):
+
+    def test_empty_column(self):
+        response = self.upload("a,b\n1,\n2,\n3,\n")
+
+        self.assertIn("b", response.context["numeric_cols"])
+        self.assertNotIn("b", response.context["categorical_cols"])
+        self.assertEqual(response.context["missing_values"], 3)
+
+    def test_duplicate_headers(self):
+        response = self.upload("a,a\n1.5,2\n3,4\n")
+
+        self.assertEqual(list(response.context["numeric_cols"]), ["a", "a.1"])
+        self.assertIn(
+            "'a.1' has an average of 3.00, with values ranging from 2 to 4.",
+            response.context["insights"],
+        )
+
+    def test_remove_duplicates_and_fill_missing(self):
+        self.upload(
+            "region,sales,qty\nN,10,1\nS,,2\nN,10,1\n,40,\n",
+            remove_duplicates="on",
+            fill_missing="on",
+        )
+
+        response = self.client.get(reverse("download_cleaned_csv"))
+        cleaned = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(
+            cleaned,
+            "region,sales,qty\nN,10,1.0\nS,25,2.0\nUnknown,40,1.5\n",
+        )
+
+    def test_fill_missing_in_boolean_column(self):
+        response = self.upload("a,flag\n1,true\n2,\n3,false\n", fill_missing="on")
+
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse("download_cleaned_csv"))
+        cleaned = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(cleaned, "a,flag\n1,True\n2,Unknown\n3,False\n")
+
+
+# =========================================
+# STAGE 5.5 — AUTO INSIGHTS
+# =========================================
+class GenerateInsightsTests(SimpleTestCase):
+
+    def test_most_frequent_value(self):
+        df = pd.DataFrame({"region": ["N", "S", "S", None]})
+
+        insights = generate_insights(df, df.columns[:0], df.columns)
+
+        self.assertIn("The most frequent value in 'region' is 'S'.", insights)
+
+    def test_all_missing_categorical_columns(self):
+        df = pd.DataFrame({"a": [None, None], "b": [None, None]}, dtype=object)
+
+        insights = generate_insights(df, df.columns[:0], df.columns)
+
+        self.assertFalse(any("most frequent" in line for line in insights))
+
+
+# =========================================
+# UTILITY — RESTORE INTEGER COLUMNS
+# =========================================
+def reference_integer_columns(df):
+    # Per-column pandas version the numpy pass must agree with
+    df = df.copy()
+    for col in df.select_dtypes(include="number").columns:
+        series = df[col].dropna()
+        if not series.empty and (series % 1 == 0).all():
+            df[col] = df[col].astype("Int64")
+    return df
+
+
+class RestoreIntegerColumnsTests(SimpleTestCase):
+
+    def test_matches_per_column_reference(self):
+        df = pd.DataFrame({
+            "whole": [1.0, 2.0, np.nan, 4.0],
+            "fraction": [1.0, 2.5, 3.0, 4.0],
+            "infinite": [1.0, np.inf, 3.0, 4.0],
+            "empty": [np.nan] * 4,
+            "int": [1, 2, 3, 4],
+            "nullable": pd.array([1, None, 3, 4], dtype="Int64"),
+            "text": ["a", "b", "c", "d"],
+        })
+
+        pd.testing.assert_frame_equal(
+            restore_integer_columns(df, df.select_dtypes(include="number").columns),
+            reference_integer_columns(df),
+        )
+
+    def test_random_frames(self):
+        for seed in range(20):
+            df = random_frame(seed).round({"normal": 0})
+
+            with self.subTest(seed=seed):
+                pd.testing.assert_frame_equal(
+                    restore_integer_columns(df, df.select_dtypes(include="number").columns),
+                    reference_integer_columns(df),
+                )
+
+
+# =========================================
+# STAGE 7 — DATA WARNINGS
+# =========================================
+def reference_warnings(df, numeric_cols, categorical_cols):
+    # Per-column pandas version the vectorised code must agree with
+    warnings = []
+
+    for col in numeric_cols:
+        series = df[col].dropna()
+        if series.empty:
+            continue
+
+        q1 = series.quantile(0.25)
+        q3 = series.quantile(0.75)
+        iqr = q3 - q1
+
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+
+        outliers = series[(series < lower) | (series > upper)]
+        if len(outliers) > 0:
+            warnings.append(
+                f"Column '{col}' contains {len(outliers)} potential outliers."
+            )
+
+        if abs(series.mean() - series.median()) > series.std():
+            warnings.append(
+                f"Column '{col}' appears to be skewed."
+            )
+
+    for col in categorical_cols:
+        unique_count = df[col].nunique()
+        if unique_count > 15:
+            warnings.append(
+                f"Column '{col}' has high cardinality ({unique_count} unique values)."
+            )
+
+    return warnings
+
+
+class DetectDataWarningsTests(SimpleTestCase):
+
+    def test_matches_per_column_reference(self):
+        for seed in range(20):
+            df = random_frame(seed)
+            numeric_cols = df.select_dtypes(include="number").columns
+            categorical_cols = df.select_dtypes(include="object").columns
+
+            with self.subTest(seed=seed):
+                self.assertEqual(
+                    detect_data_warnings(df, numeric_cols, categorical_cols),
+                    reference_warnings(df, numeric_cols, categorical_cols),
+                )
+
+    def test_single_value_nullable_integer_column(self):
+        df = pd.DataFrame({"a": pd.array([3, None, None], dtype="Int64")})
+
+        self.assertEqual(detect_data_warnings(df, df.columns, df.columns[:0]), [])
+
+
+# =========================================
+# STAGE 8 → 10 — EXPORT PDF REPORT
+# =========================================
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+@mock.patch("plotly.graph_objects.Figure.to_image", return_value=b"<svg/>")
+class ExportReportTests(DashboardTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.weasyprint = mock.MagicMock()
+        self.weasyprint.HTML.return_value.write_pdf.return_value = b"%PDF-test"
+        self.stub_weasyprint(self.weasyprint)
+
+        self.upload("region,sales\nN,10\nS,20\n")
+        self.client.post(reverse("upload"), {
+            "chart_type": "bar",
+            "metric": "sales",
+            "dimension": "region",
+        })
+
+    def stub_weasyprint(self, module):
+        # Swap only this entry: patch.dict(sys.modules) would also drop
+        # modules first imported during the test, e.g. parts of plotly
+        previous = sys.modules.get("weasyprint")
+        sys.modules["weasyprint"] = module
+
+        if previous is None:
+            self.addCleanup(sys.modules.pop, "weasyprint", None)
+        else:
+            self.addCleanup(sys.modules.__setitem__, "weasyprint", previous)
+
+    def export(self):
+        return self.client.post(reverse("export_report_pdf"))
+
+    def test_report_is_built_and_downloaded(self, to_image):
+        response = self.export()
+        self.assertEqual(response.status_code, 202)
+
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(status["status"], CachedFile.READY)
+
+        download = self.client.get(status["download_url"])
+        self.assertEqual(b"".join(download.streaming_content), b"%PDF-test")
+
+        to_image.assert_called_once_with(format="svg")
+        html = self.weasyprint.HTML.call_args.kwargs["string"]
+        self.assertIn("data:image/svg+xml;base64,PHN2Zy8+", html)
+
+    def test_chart_on_overwritten_cleaned_data_is_skipped(self, to_image):
+        self.upload("region,sales\nN,10\nN,10\nS,\n", fill_missing="on")
+        self.client.post(reverse("upload"), {
+            "chart_type": "bar",
+            "metric": "sales",
+            "dimension": "region",
+        })
+        # Cleaning again rewrites the same cleaned file
+        self.client.post(reverse("upload"), {"remove_duplicates": "on"})
+
+        # Chart 0 is setUp's chart on the raw upload
+        response = self.client.post(reverse("export_report_pdf"), {
+            "selected_charts": ["1"],
+        })
+        status = self.client.get(response.json()["status_url"]).json()
+
+        self.assertEqual(status["status"], CachedFile.READY)
+        to_image.assert_not_called()
+        html = self.weasyprint.HTML.call_args.kwargs["string"]
+        self.assertIn("has changed since it was created", html)
+
+    def test_task_failure_marks_report_failed(self, to_image):
+        # None in sys.modules makes the import fail, like a worker without Pango
+        sys.modules["weasyprint"] = None
+
+        response = self.export()
+        self.assertEqual(response.status_code, 202)
+
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(status["status"], CachedFile.FAILED)
+        self.assertIsNone(status["download_url"])
+
+    def test_unreachable_broker(self, to_image):
+        with mock.patch(
+            "analytics.views.build_report.delay",
+            side_effect=OperationalError("connection refused"),
+        ):
+            response = self.export()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("error", response.json())
+        self.assertEqual(CachedFile.objects.get().status, CachedFile.FAILED)
+
+    def test_export_requires_post(self, to_image):
+        response = self.client.get(reverse("export_report_pdf"))
+
+        self.assertEqual(response.status_code, 405)
@@ -1,9 +1,18 @@
 from django.urls import path
-from .views import upload_page, download_csv, download_cleaned_csv, export_report_pdf
+from .views import (
+    upload_page,
+    download_csv,
+    download_cleaned_csv,
+    export_report_pdf,
+    export_report_status,
+    export_report_download,
+)
 
 urlpatterns = [
     path("", upload_page, name="upload"),
     path("download/raw/", download_csv, name="download_csv"),
     path("download/cleaned/", download_cleaned_csv, name="download_cleaned_csv"),
     path("export-report/pdf/", export_report_pdf, name="export_report_pdf"),
+    path("export-report/status/<uuid:file_id>/", export_report_status, name="export_report_status"),
+    path("export-report/download/<uuid:file_id>/", export_report_download, name="export_report_download"),
 ]
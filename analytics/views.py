@@ -1,57 +1,40 @@
 # =========================================
 # IMPORTS
 # =========================================
-from django.shortcuts import render
-from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
 from django.conf import settings
-from django.template.loader import get_template
-
+from django.core.cache import cache
+from django.urls import reverse
+from kombu.exceptions import OperationalError
+
+from .analysis import (
+    CHARTS_TTL,
+    build_chart,
+    dataset_key,
+    detect_data_warnings,
+    generate_insights,
+    load_dataset,
+    restore_integer_columns,
+    total_nulls,
+)
 from .forms import DatasetUploadForm
+from .models import CachedFile
+from .tasks import build_report, purge_expired_reports
 
-import pandas as pd
-import plotly.express as px
+import hashlib
 import os
-
-from xhtml2pdf import pisa
-from io import BytesIO
+import re
+import uuid
 
 
 # =========================================
-# STAGE 5.5 — AUTO INSIGHTS
+# STAGE 6 — AUTO CHART RECOMMENDATION
 # =========================================
-def generate_insights(df):
-    insights = []
-
-    insights.append(
-        f"The dataset contains {df.shape[0]} rows and {df.shape[1]} columns."
-    )
-
-    total_missing = int(df.isnull().sum().sum())
-    if total_missing == 0:
-        insights.append("There are no missing values after cleaning.")
-    else:
-        insights.append(f"There are {total_missing} missing values remaining.")
+TIME_KEYWORDS_RE = re.compile(r"year|date|month|time", re.IGNORECASE)
 
-    numeric_cols = df.select_dtypes(include="number").columns
-    for col in numeric_cols:
-        insights.append(
-            f"'{col}' has an average of {df[col].mean():.2f}, "
-            f"with values ranging from {df[col].min()} to {df[col].max()}."
-        )
 
-    categorical_cols = df.select_dtypes(include="object").columns
-    for col in categorical_cols:
-        top_value = df[col].value_counts().idxmax()
-        insights.append(
-            f"The most frequent value in '{col}' is '{top_value}'."
-        )
-
-    return insights
-
-
-# =========================================
-# STAGE 6 — AUTO CHART RECOMMENDATION
-# =========================================
 def recommend_chart(metric, dimension, numeric_cols, categorical_cols, df=None):
     if metric and not dimension:
         if metric in numeric_cols:
@@ -61,8 +44,7 @@ def recommend_chart(metric, dimension, numeric_cols, categorical_cols, df=None):
 
         if metric in numeric_cols and dimension in categorical_cols:
 
-            time_keywords = ["year", "date", "month", "time"]
-            if any(word in dimension.lower() for word in time_keywords):
+            if TIME_KEYWORDS_RE.search(dimension):
                 return "line"
 
             if df is not None and df[dimension].nunique() <= 10:
@@ -77,56 +59,30 @@ def recommend_chart(metric, dimension, numeric_cols, categorical_cols, df=None):
 
 
 # =========================================
-# UTILITY — RESTORE INTEGER COLUMNS
+# UTILITY — PER-SESSION CHART LIST (CACHE)
 # =========================================
-def restore_integer_columns(df):
-    for col in df.select_dtypes(include="number").columns:
-        series = df[col].dropna()
-        if not series.empty and (series % 1 == 0).all():
-            df[col] = df[col].astype("Int64")
-    return df
+def get_charts(request):
+    charts_id = request.session.get("charts_id")
+    if not charts_id:
+        return []
+    return cache.get(f"charts:{charts_id}", [])
 
 
-# =========================================
-# STAGE 7 — DATA WARNINGS
-# =========================================
-def detect_data_warnings(df):
-    warnings = []
-
-    numeric_cols = df.select_dtypes(include="number").columns
-    categorical_cols = df.select_dtypes(include="object").columns
-
-    for col in numeric_cols:
-        series = df[col].dropna()
-        if series.empty:
-            continue
-
-        q1 = series.quantile(0.25)
-        q3 = series.quantile(0.75)
-        iqr = q3 - q1
-
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-
-        outliers = series[(series < lower) | (series > upper)]
-        if len(outliers) > 0:
-            warnings.append(
-                f"Column '{col}' contains {len(outliers)} potential outliers."
-            )
-
-        if abs(series.mean() - series.median()) > series.std():
-            warnings.append(
-                f"Column '{col}' appears to be skewed."
-            )
+def save_charts(request, charts):
+    """
+    Keep the chart list in the cache so the session only
+    stores a fixed-size id, however many charts are made.
+    The list expires CHARTS_TTL after the last chart was added,
+    even if the session lives on; the dashboard then starts empty.
+    """
+    charts_id = request.session.setdefault("charts_id", uuid.uuid4().hex)
+    cache.set(f"charts:{charts_id}", charts, CHARTS_TTL)
 
-    for col in categorical_cols:
-        unique_count = df[col].nunique()
-        if unique_count > 15:
-            warnings.append(
-                f"Column '{col}' has high cardinality ({unique_count} unique values)."
-            )
 
-    return warnings
+def clear_charts(request):
+    charts_id = request.session.pop("charts_id", None)
+    if charts_id:
+        cache.delete(f"charts:{charts_id}")
 
 
 # =========================================
@@ -135,7 +91,10 @@ def detect_data_warnings(df):
 def upload_page(request):
 
     if request.method == "GET":
-        request.session.flush()
+        # Reset the dashboard without destroying and re-creating the session
+        for key in ("dataset_path", "cleaned_dataset_path", "stats_cache"):
+            request.session.pop(key, None)
+        clear_charts(request)
 
     if request.method == "POST" and "file" in request.FILES:
         form = DatasetUploadForm(request.POST, request.FILES)
@@ -152,98 +111,112 @@ def upload_page(request):
             "form": DatasetUploadForm()
         })
 
-    if "charts" not in request.session:
-        request.session["charts"] = []
-
     if cleaned_path and os.path.exists(cleaned_path):
-        df = pd.read_csv(cleaned_path)
+        data_path = cleaned_path
     else:
-        df = pd.read_csv(dataset_path)
+        data_path = dataset_path
+
+    df = load_dataset(data_path)
+
+    # Cleaning only moves columns between numeric dtypes, so these stay valid
+    numeric_cols = df.select_dtypes(include="number").columns
+    categorical_cols = df.select_dtypes(include="object").columns
 
     remove_duplicates = request.POST.get("remove_duplicates")
     fill_missing = request.POST.get("fill_missing")
 
     if remove_duplicates or fill_missing:
-        cleaned_df = df.copy()
-
-        if remove_duplicates:
-            cleaned_df = cleaned_df.drop_duplicates()
+        # df is the shared cached frame; every step below returns a new frame
+        cleaned_df = df.drop_duplicates() if remove_duplicates else df
 
         if fill_missing:
-            for col in cleaned_df.columns:
-                if cleaned_df[col].dtype == "object":
-                    cleaned_df[col] = cleaned_df[col].fillna("Unknown")
-                else:
-                    cleaned_df[col] = cleaned_df[col].fillna(cleaned_df[col].mean())
+            # The mean may be fractional; integers are restored below
+            cleaned_df = cleaned_df.astype({
+                col: "float64"
+                for col in numeric_cols
+                if cleaned_df[col].dtype == "Int64"
+            })
+
+            fill_values = {col: "Unknown" for col in categorical_cols}
+            fill_values.update(cleaned_df[numeric_cols].mean().to_dict())
+            cleaned_df = cleaned_df.fillna(fill_values)
+
+            # "Unknown" next to e.g. True/False; Feather needs one type per column
+            cleaned_df = cleaned_df.astype({col: str for col in categorical_cols})
+
+        cleaned_df = restore_integer_columns(cleaned_df.reset_index(drop=True), numeric_cols)
 
         cleaned_dir = settings.MEDIA_ROOT / "cleaned"
         cleaned_dir.mkdir(exist_ok=True)
-        cleaned_file_path = cleaned_dir / "cleaned_dataset.csv"
-        cleaned_df.to_csv(cleaned_file_path, index=False)
+        cleaned_file_path = cleaned_dir / "cleaned_dataset.feather"
+        cleaned_df.to_feather(cleaned_file_path)
 
         request.session["cleaned_dataset_path"] = str(cleaned_file_path)
-        df = restore_integer_columns(cleaned_df)
+        data_path = str(cleaned_file_path)
+        df = cleaned_df
 
-    insights = generate_insights(df)
-    warnings = detect_data_warnings(df)
+    # Insights and warnings only change when the data file does
+    stats_key = dataset_key(data_path)
+    stats_cache = request.session.get("stats_cache")
+
+    if stats_cache and stats_cache["key"] == stats_key:
+        insights = stats_cache["insights"]
+        warnings = stats_cache["warnings"]
+    else:
+        insights = generate_insights(df, numeric_cols, categorical_cols)
+        warnings = detect_data_warnings(df, numeric_cols, categorical_cols)
+        request.session["stats_cache"] = {
+            "key": stats_key,
+            "insights": insights,
+            "warnings": warnings,
+        }
 
     total_rows, total_cols = df.shape
-    missing_values = int(df.isnull().sum().sum())
-    df = restore_integer_columns(df)
-
-    table_html = (
-        df.head()
-        .style
-        .set_properties(**{"text-align": "center"})
-        .hide(axis="index")
-        .to_html()
-    )
+    missing_values = total_nulls(df)
 
-    numeric_cols = df.select_dtypes(include="number").columns.tolist()
-    categorical_cols = df.select_dtypes(include="object").columns.tolist()
+    table_html = df.head().to_html(index=False, classes="centered", border=0)
 
     chart_type = request.POST.get("chart_type")
     metric = request.POST.get("metric")
     dimension = request.POST.get("dimension")
 
     if not chart_type and metric:
-        chart_type = recommend_chart(metric, dimension, numeric_cols, categorical_cols, df)
+        chart_type = recommend_chart(
+            metric, dimension, set(numeric_cols), set(categorical_cols), df
+        )
 
     chart_html = None
 
     if chart_type and metric and (dimension or chart_type == "histogram"):
 
-        if chart_type == "bar":
-            fig = px.bar(df, x=dimension, y=metric)
-        elif chart_type == "line":
-            fig = px.line(df, x=dimension, y=metric)
-        elif chart_type == "area":
-            fig = px.area(df, x=dimension, y=metric)
-        elif chart_type == "histogram":
-            fig = px.histogram(df, x=metric)
-        elif chart_type == "pie":
-            fig = px.pie(df, names=dimension, values=metric)
-        elif chart_type == "box":
-            fig = px.box(df, x=dimension, y=metric)
-        elif chart_type == "scatter":
-            fig = px.scatter(df, x=dimension, y=metric)
-
-        chart_html = fig.to_html()
-
-        charts = request.session.get("charts", [])
-        idx = len(charts) + 1
-        image_path = settings.MEDIA_ROOT / f"chart_{idx}.png"
-        fig.write_image(image_path)
+        fig = build_chart(df, chart_type, metric, dimension)
+
+        # plotly.js comes from the CDN instead of ~3MB inlined per response
+        chart_html = fig.to_html(
+            include_plotlyjs="cdn",
+            full_html=False,
+            config={"responsive": True},
+        )
+
+        # The SVG is rendered by the report task, only if the chart is exported.
+        # Same chart on the same data version → same cache entry, rendered once.
+        digest = hashlib.blake2b(
+            f"{chart_type}|{metric}|{dimension}|{stats_key}".encode(),
+            digest_size=8,
+        ).hexdigest()
 
+        charts = get_charts(request)
         charts.append({
             "title": f"{metric} by {dimension}" if dimension else metric,
             "chart_type": chart_type,
             "metric": metric,
             "dimension": dimension,
-            "image": settings.MEDIA_URL + f"chart_{idx}.png"  # ✅ CHANGED
+            "data_path": data_path,
+            "data_key": stats_key,
+            "digest": digest,
         })
 
-        request.session["charts"] = charts
+        save_charts(request, charts)
 
     return render(request, "analytics/dashboard.html", {
         "form": DatasetUploadForm(),
@@ -256,7 +229,7 @@ def upload_page(request):
         "categorical_cols": categorical_cols,
         "insights": insights,
         "warnings": warnings,
-        "charts": request.session.get("charts", []),
+        "charts": get_charts(request),
         "has_file": True,
         "chart_type": chart_type,
         "metric": metric,
@@ -264,6 +237,15 @@ def upload_page(request):
     })
 
 
+# =========================================
+# UTILITY — STREAM CSV IN CHUNKS
+# =========================================
+def iter_csv(df, chunk_rows=10_000):
+    yield df.iloc[:0].to_csv(index=False)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False)
+
+
 # =========================================
 # DOWNLOAD RAW CSV
 # =========================================
@@ -272,10 +254,12 @@ def download_csv(request):
     if not path or not os.path.exists(path):
         return HttpResponse("No dataset available")
 
-    with open(path, "rb") as f:
-        response = HttpResponse(f.read(), content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="raw_dataset.csv"'
-        return response
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename="raw_dataset.csv",
+        content_type="text/csv",
+    )
 
 
 # =========================================
@@ -286,91 +270,74 @@ def download_cleaned_csv(request):
     if not path or not os.path.exists(path):
         return HttpResponse("No cleaned dataset available")
 
-    with open(path, "rb") as f:
-        response = HttpResponse(f.read(), content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="cleaned_dataset.csv"'
-        return response
-
-
-def link_callback(uri, rel):
-    """
-    Convert MEDIA_URL paths to absolute file system paths
-    so xhtml2pdf can load images correctly.
-    """
-    if uri.startswith(settings.MEDIA_URL):
-        return os.path.join(settings.MEDIA_ROOT, uri.replace(settings.MEDIA_URL, ""))
-    return uri
+    response = StreamingHttpResponse(
+        iter_csv(load_dataset(path)),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = 'attachment; filename="cleaned_dataset.csv"'
+    return response
 
 
 # =========================================
 # STAGE 8 → 10 — EXPORT PDF REPORT
 # =========================================
+@require_POST
 def export_report_pdf(request):
 
     dataset_path = request.session.get("dataset_path")
     cleaned_path = request.session.get("cleaned_dataset_path")
 
     if cleaned_path and os.path.exists(cleaned_path):
-        df = pd.read_csv(cleaned_path)
+        data_path = cleaned_path
     elif dataset_path and os.path.exists(dataset_path):
-        df = pd.read_csv(dataset_path)
+        data_path = dataset_path
     else:
-        return HttpResponse("No data available to export.")
-
-    df = restore_integer_columns(df)
-
-    total_rows, total_cols = df.shape
-    missing_values = int(df.isnull().sum().sum())
-
-    table_html = (
-        df.head(20)
-        .style
-        .set_properties(**{"text-align": "center"})
-        .hide(axis="index")
-        .to_html()
-    )
+        return JsonResponse({"error": "No data available to export."}, status=400)
 
-    insights = generate_insights(df)
-    warnings = detect_data_warnings(df)
+    purge_expired_reports()
 
-    charts = request.session.get("charts", [])
-    for chart in charts:
-    # convert absolute path → MEDIA URL
-        chart["image"] = settings.MEDIA_URL + os.path.basename(chart["image"])
-
-    # -------------------------------------
-# FILTER SELECTED CHARTS
-# -------------------------------------
-    selected_indexes = request.POST.getlist("selected_charts")
-
-    charts = request.session.get("charts", [])
+    report = CachedFile.objects.create()
+    try:
+        build_report.delay(
+            str(report.id),
+            data_path,
+            get_charts(request),
+            request.POST.getlist("selected_charts"),
+        )
+    except OperationalError:
+        # The broker is unreachable; don't leave a report pending forever
+        report.status = CachedFile.FAILED
+        report.save(update_fields=["status"])
+        return JsonResponse({"error": "Report service is unavailable."}, status=503)
 
-    if selected_indexes:
-        charts = [
-        charts[int(i)]
-        for i in selected_indexes
-        if i.isdigit() and int(i) < len(charts)
-    ]
+    return JsonResponse({
+        "file_id": str(report.id),
+        "status_url": reverse("export_report_status", args=[report.id]),
+    }, status=202)
 
 
-    template = get_template("analytics/report.html")
-    html = template.render({
-        "total_rows": total_rows,
-        "total_cols": total_cols,
-        "missing_values": missing_values,
-        "table_html": table_html,
-        "insights": insights,
-        "warnings": warnings,
-        "charts": charts,
+# =========================================
+# EXPORT PDF REPORT — STATUS + DOWNLOAD
+# =========================================
+def export_report_status(request, file_id):
+    report = get_object_or_404(CachedFile, pk=file_id)
+
+    return JsonResponse({
+        "file_id": str(report.id),
+        "status": report.status,
+        "download_url": (
+            reverse("export_report_download", args=[report.id])
+            if report.status == CachedFile.READY else None
+        ),
     })
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="analysis_report.pdf"'
 
-    pisa.CreatePDF(
-    BytesIO(html.encode("UTF-8")),
-    dest=response,
-    link_callback=link_callback
-)
+def export_report_download(request, file_id):
+    report = get_object_or_404(CachedFile, pk=file_id, status=CachedFile.READY)
 
-    return response
\ No newline at end of file
+    return FileResponse(
+        report.file.open("rb"),
+        as_attachment=True,
+        filename="analysis_report.pdf",
+        content_type="application/pdf",
+    )